@@ -0,0 +1,99 @@
+import os
+import sys
+import types
+import zoneinfo
+from datetime import datetime
+
+import pytest
+
+
+# provide a minimal pytz replacement since package may not be installed
+class DummyPytzModule(types.ModuleType):
+    class UnknownTimeZoneError(Exception):
+        pass
+
+    class BaseTzInfo(zoneinfo.ZoneInfo):
+        pass
+
+    def timezone(self, name: str):
+        try:
+            return zoneinfo.ZoneInfo(name)
+        except Exception:
+            raise self.UnknownTimeZoneError
+
+    utc = zoneinfo.ZoneInfo("UTC")
+
+
+def _isoparse(s: str):
+    if s.endswith("Z"):
+        s = s[:-1] + "+00:00"
+    return datetime.fromisoformat(s)
+
+
+# zoneinfo-backed pytz shared by the handler, tool and utils suites
+@pytest.fixture
+def pytz_stub(monkeypatch):
+    dummy = DummyPytzModule("pytz")
+    monkeypatch.setitem(sys.modules, "pytz", dummy)
+    exc_mod = types.ModuleType("pytz.exceptions")
+    exc_mod.UnknownTimeZoneError = dummy.UnknownTimeZoneError
+    monkeypatch.setitem(sys.modules, "pytz.exceptions", exc_mod)
+    return dummy
+
+
+# minimal dateutil package exposing parser.isoparse
+@pytest.fixture
+def dateutil_stub(monkeypatch):
+    dateutil_pkg = types.ModuleType("dateutil")
+    dateutil_pkg.__path__ = []
+    parser_mod = types.ModuleType("dateutil.parser")
+    parser_mod.isoparse = _isoparse
+    monkeypatch.setitem(sys.modules, "dateutil", dateutil_pkg)
+    monkeypatch.setitem(sys.modules, "dateutil.parser", parser_mod)
+    return dateutil_pkg
+
+
+_TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+_PROJECT_ROOT = os.path.dirname(_TESTS_DIR)
+
+# the project's own top-level modules and packages; anything else under the
+# root, such as an in-repo virtualenv, is left alone
+_PROJECT_MODULES = frozenset(
+    entry[:-3] if entry.endswith(".py") else entry
+    for entry in os.listdir(_PROJECT_ROOT)
+    if entry != "tests"
+    and (
+        entry.endswith(".py")
+        or os.path.isfile(os.path.join(_PROJECT_ROOT, entry, "__init__.py"))
+    )
+)
+
+
+# drop project modules first imported since `before` was taken, so the next
+# test imports them against its own stubs instead of reusing a copy bound to
+# stubs that have already been torn down
+def _forget_project_imports(before):
+    for name in set(sys.modules) - before:
+        if name.partition(".")[0] not in _PROJECT_MODULES:
+            continue
+        path = getattr(sys.modules.get(name), "__file__", None) or ""
+        if path.startswith(_PROJECT_ROOT + os.sep):
+            sys.modules.pop(name, None)
+
+
+# module-level fixtures such as the integration suites' gs_base import once
+# per module; forget those imports when the module finishes
+@pytest.fixture(scope="module", autouse=True)
+def _isolate_module_imports():
+    before = set(sys.modules)
+    yield
+    _forget_project_imports(before)
+
+
+# autouse fixtures are torn down last, after monkeypatch has put back the
+# sys.modules entries it replaced
+@pytest.fixture(autouse=True)
+def _isolate_test_imports():
+    before = set(sys.modules)
+    yield
+    _forget_project_imports(before)
@@ -0,0 +1,119 @@
+import itertools
+
+# In-memory Firestore fakes shared by the integration suites
+class FakeArrayUnion:
+    __slots__ = ("items",)
+    def __init__(self, items):
+        self.items = items if isinstance(items, list) else list(items)
+
+# append the new items not already present; a set keeps this linear for
+# hashable values, with a plain scan as the fallback for dicts and lists
+def _array_union(items, new_items):
+    try:
+        seen = set(items)
+        for item in new_items:
+            if item not in seen:
+                items.append(item)
+                seen.add(item)
+    except TypeError:
+        for item in new_items:
+            if item not in items:
+                items.append(item)
+    return items
+
+class FakeSnapshot:
+    __slots__ = ("_data",)
+    def __init__(self, data):
+        self._data = data
+    @property
+    def exists(self):
+        return self._data is not None
+    def to_dict(self):
+        return self._data
+    def get(self, key):
+        return self._data.get(key) if self._data else None
+
+class FakeDocument:
+    __slots__ = ("parent", "doc_id")
+    def __init__(self, collection, doc_id):
+        self.parent = collection
+        self.doc_id = doc_id
+    def get(self, **kwargs):
+        data = self.parent.store.get(self.doc_id)
+        return FakeSnapshot(data)
+    def set(self, data, merge=False):
+        store = self.parent.store
+        existing = store.setdefault(self.doc_id, {}) if merge else {}
+        for key, value in data.items():
+            if isinstance(value, FakeArrayUnion):
+                if not value.items:
+                    # nothing to merge, but like Firestore still create the field
+                    existing.setdefault(key, [])
+                    continue
+                existing[key] = _array_union(existing.get(key, []), value.items)
+            else:
+                existing[key] = value
+        if not merge:
+            store[self.doc_id] = existing
+    def delete(self):
+        self.parent.store.pop(self.doc_id, None)
+    def update(self, data):
+        self.parent.store.setdefault(self.doc_id, {}).update(data)
+    def collection(self, name):
+        key = (self.doc_id, name)
+        sub = self.parent.subcollections.get(key)
+        if sub is None:
+            sub = self.parent.subcollections[key] = FakeCollection()
+        return sub
+
+class FakeCollection:
+    __slots__ = ("store", "subcollections", "documents")
+    _auto_ids = itertools.count(1)
+    def __init__(self):
+        self.store = {}
+        self.subcollections = {}
+        self.documents = {}
+    def document(self, doc_id=None):
+        doc_id = doc_id or f"auto-{next(self._auto_ids)}"
+        # document references are stateless views over store, so reuse them
+        doc = self.documents.get(doc_id)
+        if doc is None:
+            doc = self.documents[doc_id] = FakeDocument(self, doc_id)
+        return doc
+
+# writes are queued and only applied on commit, like Firestore transactions
+# and batches; used as a context manager it commits on a clean exit
+class FakeTransaction:
+    __slots__ = ("_ops",)
+    def __init__(self):
+        self._ops = []
+    def set(self, doc_ref, data, merge=False):
+        self._ops.append(lambda: doc_ref.set(data, merge=merge))
+    def update(self, doc_ref, data):
+        self._ops.append(lambda: doc_ref.update(data))
+    def delete(self, doc_ref):
+        self._ops.append(doc_ref.delete)
+    def commit(self):
+        ops, self._ops = self._ops, []
+        for op in ops:
+            op()
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self._ops.clear()
+
+class FakeDB:
+    __slots__ = ("collections",)
+    def __init__(self):
+        self.collections = {}
+    def collection(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeCollection()
+        return self.collections[name]
+    def transaction(self):
+        return FakeTransaction()
+    def batch(self):
+        return FakeTransaction()
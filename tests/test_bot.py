@@ -122,8 +122,7 @@ def bot_module(monkeypatch):
     flask_mod.Flask = DummyFlask
     monkeypatch.setitem(sys.modules, "flask", flask_mod)
 
-    if "bot" in sys.modules:
-        del sys.modules["bot"]
+    monkeypatch.delitem(sys.modules, "bot", raising=False)
     bot = importlib.import_module("bot")
 
     # patch threading.Thread after import
@@ -0,0 +1,68 @@
+import pytest
+
+from tests.fakes import FakeArrayUnion, FakeDB, _array_union
+
+
+def test_transaction_applies_writes_on_commit():
+    db = FakeDB()
+    doc = db.collection("c").document("d")
+    transaction = db.transaction()
+    transaction.set(doc, {"a": 1})
+    transaction.update(doc, {"b": 2})
+    assert not doc.get().exists
+    transaction.commit()
+    assert doc.get().to_dict() == {"a": 1, "b": 2}
+    transaction.delete(doc)
+    assert doc.get().exists
+    transaction.commit()
+    assert not doc.get().exists
+
+
+def test_batch_context_commits_on_clean_exit():
+    db = FakeDB()
+    doc = db.collection("c").document("d")
+    with db.batch() as batch:
+        batch.set(doc, {"a": 1})
+        assert not doc.get().exists
+    assert doc.get().to_dict() == {"a": 1}
+
+
+def test_batch_context_drops_writes_on_error():
+    db = FakeDB()
+    doc = db.collection("c").document("d")
+    with pytest.raises(RuntimeError):
+        with db.batch() as batch:
+            batch.set(doc, {"a": 1})
+            raise RuntimeError("boom")
+    assert not doc.get().exists
+    batch.commit()
+    assert not doc.get().exists
+
+
+def test_document_subcollection_is_reused():
+    doc = FakeDB().collection("c").document("d")
+    sub = doc.collection("sub")
+    assert doc.collection("sub") is sub
+    assert doc.collection("other") is not sub
+
+
+def test_empty_array_union_creates_missing_field_only():
+    doc = FakeDB().collection("c").document("d")
+    doc.set({"items": FakeArrayUnion([]), "owner": "1"})
+    assert doc.get().to_dict() == {"items": [], "owner": "1"}
+    doc.set({"items": FakeArrayUnion(["milk"])}, merge=True)
+    doc.set({"items": FakeArrayUnion([])}, merge=True)
+    assert doc.get().to_dict() == {"items": ["milk"], "owner": "1"}
+
+
+@pytest.mark.parametrize(
+    "existing,new,expected",
+    [
+        (["a", "b"], ["b", "c", "c"], ["a", "b", "c"]),
+        ([{"a": 1}], [{"a": 1}, {"b": 2}, {"b": 2}], [{"a": 1}, {"b": 2}]),
+        (["x"], ["y", {"a": 1}, "y", "x", {"a": 1}], ["x", "y", {"a": 1}]),
+    ],
+    ids=["hashable", "unhashable", "unhashable_mid_merge"],
+)
+def test_array_union_dedupes_in_order(existing, new, expected):
+    assert _array_union(list(existing), new) == expected
@@ -2,78 +2,18 @@ import sys
 import types
 import importlib
 import asyncio
-import uuid
 
 import pytest
 
-# Fake Firestore implementation
-class FakeArrayUnion:
-    def __init__(self, items):
-        self.items = list(items)
-
-class FakeSnapshot:
-    def __init__(self, data):
-        self._data = data
-    @property
-    def exists(self):
-        return self._data is not None
-    def to_dict(self):
-        return self._data
-    def get(self, key):
-        return self._data.get(key) if self._data else None
-
-class FakeDocument:
-    def __init__(self, collection, doc_id):
-        self.collection = collection
-        self.doc_id = doc_id
-    def get(self, **kwargs):
-        data = self.collection.store.get(self.doc_id)
-        return FakeSnapshot(data)
-    def set(self, data, merge=False):
-        existing = self.collection.store.get(self.doc_id, {}) if merge else {}
-        for key, value in data.items():
-            if isinstance(value, FakeArrayUnion):
-                items = existing.get(key, [])
-                for item in value.items:
-                    if item not in items:
-                        items.append(item)
-                existing[key] = items
-            else:
-                existing[key] = value
-        self.collection.store[self.doc_id] = existing
-    def delete(self):
-        self.collection.store.pop(self.doc_id, None)
-    def update(self, data):
-        existing = self.collection.store.get(self.doc_id, {})
-        existing.update(data)
-        self.collection.store[self.doc_id] = existing
-    def collection(self, name):
-        return self.collection.subcollections.setdefault((self.doc_id, name), FakeCollection())
-
-class FakeCollection:
-    def __init__(self):
-        self.store = {}
-        self.subcollections = {}
-    def document(self, doc_id=None):
-        doc_id = doc_id or str(uuid.uuid4())
-        return FakeDocument(self, doc_id)
-
-class FakeTransaction:
-    def delete(self, doc_ref):
-        doc_ref.delete()
-
-class FakeDB:
-    def __init__(self):
-        self.collections = {}
-    def collection(self, name):
-        if name not in self.collections:
-            self.collections[name] = FakeCollection()
-        return self.collections[name]
-    def transaction(self):
-        return FakeTransaction()
+from tests.fakes import FakeArrayUnion, FakeDB
 
-@pytest.fixture
-def gs_module(monkeypatch):
+# zone names the pytz stub accepts; anything else is unknown
+_FAKE_TZ = frozenset({"UTC", "America/New_York", "Europe/London"})
+
+# stand-in modules for google_services and its third-party imports, keyed
+# by sys.modules name
+def _build_stubs():
+    stubs = {}
     # stub config
     config_mod = types.ModuleType("config")
     config_mod.FIRESTORE_DB = FakeDB()
@@ -91,7 +31,7 @@ def gs_module(monkeypatch):
     config_mod.GOOGLE_CALENDAR_SCOPES = []
     config_mod.OAUTH_REDIRECT_URI = "http://localhost"
     config_mod.MAX_HISTORY_MESSAGES = 5
-    monkeypatch.setitem(sys.modules, "config", config_mod)
+    stubs["config"] = config_mod
 
     # dummy pytz
     pytz_mod = types.ModuleType("pytz")
@@ -99,69 +39,76 @@ def gs_module(monkeypatch):
         pass
 
     def timezone(name: str):
-        if name == "UTC":
+        if name in _FAKE_TZ:
             return name
         raise UnknownTimeZoneError
 
     pytz_mod.UnknownTimeZoneError = UnknownTimeZoneError
     pytz_mod.timezone = timezone
     pytz_mod.utc = "UTC"
-    monkeypatch.setitem(sys.modules, "pytz", pytz_mod)
-    monkeypatch.setitem(sys.modules, "pytz.exceptions", types.SimpleNamespace(UnknownTimeZoneError=UnknownTimeZoneError))
+    stubs["pytz"] = pytz_mod
+    stubs["pytz.exceptions"] = types.SimpleNamespace(UnknownTimeZoneError=UnknownTimeZoneError)
 
     # minimal dateutil
     dateutil_pkg = types.ModuleType("dateutil")
     parser_mod = types.ModuleType("dateutil.parser")
     parser_mod.isoparse = lambda s: s
-    monkeypatch.setitem(sys.modules, "dateutil", dateutil_pkg)
-    monkeypatch.setitem(sys.modules, "dateutil.parser", parser_mod)
+    stubs["dateutil"] = dateutil_pkg
+    stubs["dateutil.parser"] = parser_mod
 
     # minimal pydantic
     pydantic_mod = types.ModuleType("pydantic")
     class BaseModel:
         pass
     pydantic_mod.BaseModel = BaseModel
-    monkeypatch.setitem(sys.modules, "pydantic", pydantic_mod)
+    stubs["pydantic"] = pydantic_mod
 
     # google packages
     google_pkg = types.ModuleType("google")
-    monkeypatch.setitem(sys.modules, "google", google_pkg)
+    stubs["google"] = google_pkg
     google_pkg.cloud = types.ModuleType("google.cloud")
-    monkeypatch.setitem(sys.modules, "google.cloud", google_pkg.cloud)
+    stubs["google.cloud"] = google_pkg.cloud
     firestore_mod = types.ModuleType("google.cloud.firestore")
     firestore_mod.ArrayUnion = FakeArrayUnion
     firestore_mod.SERVER_TIMESTAMP = object()
     firestore_mod.Query = types.SimpleNamespace(DESCENDING="DESC")
-    firestore_mod.transactional = lambda f: f
-    monkeypatch.setitem(sys.modules, "google.cloud.firestore", firestore_mod)
+    def transactional(func):
+        # run the body, then apply its queued writes
+        def wrapper(transaction, *args, **kwargs):
+            result = func(transaction, *args, **kwargs)
+            transaction.commit()
+            return result
+        return wrapper
+    firestore_mod.transactional = transactional
+    stubs["google.cloud.firestore"] = firestore_mod
     google_pkg.cloud.firestore = firestore_mod
     firestore_v1_mod = types.ModuleType("google.cloud.firestore_v1")
     base_query_mod = types.ModuleType("google.cloud.firestore_v1.base_query")
     base_query_mod.FieldFilter = object
-    monkeypatch.setitem(sys.modules, "google.cloud.firestore_v1", firestore_v1_mod)
-    monkeypatch.setitem(sys.modules, "google.cloud.firestore_v1.base_query", base_query_mod)
+    stubs["google.cloud.firestore_v1"] = firestore_v1_mod
+    stubs["google.cloud.firestore_v1.base_query"] = base_query_mod
     secret_mod = types.ModuleType("google.cloud.secretmanager")
-    monkeypatch.setitem(sys.modules, "google.cloud.secretmanager", secret_mod)
+    stubs["google.cloud.secretmanager"] = secret_mod
 
     google_pkg.oauth2 = types.ModuleType("google.oauth2")
     cred_mod = types.ModuleType("google.oauth2.credentials")
     cred_mod.Credentials = object
-    monkeypatch.setitem(sys.modules, "google.oauth2", google_pkg.oauth2)
-    monkeypatch.setitem(sys.modules, "google.oauth2.credentials", cred_mod)
+    stubs["google.oauth2"] = google_pkg.oauth2
+    stubs["google.oauth2.credentials"] = cred_mod
 
     google_auth_mod = types.ModuleType("google_auth_oauthlib")
     flow_mod = types.ModuleType("google_auth_oauthlib.flow")
     flow_mod.Flow = object
-    monkeypatch.setitem(sys.modules, "google_auth_oauthlib", google_auth_mod)
-    monkeypatch.setitem(sys.modules, "google_auth_oauthlib.flow", flow_mod)
+    stubs["google_auth_oauthlib"] = google_auth_mod
+    stubs["google_auth_oauthlib.flow"] = flow_mod
 
     google_pkg.auth = types.ModuleType("google.auth")
     google_pkg.auth.transport = types.ModuleType("google.auth.transport")
     requests_mod = types.ModuleType("google.auth.transport.requests")
     requests_mod.Request = object
-    monkeypatch.setitem(sys.modules, "google.auth", google_pkg.auth)
-    monkeypatch.setitem(sys.modules, "google.auth.transport", google_pkg.auth.transport)
-    monkeypatch.setitem(sys.modules, "google.auth.transport.requests", requests_mod)
+    stubs["google.auth"] = google_pkg.auth
+    stubs["google.auth.transport"] = google_pkg.auth.transport
+    stubs["google.auth.transport.requests"] = requests_mod
 
     googleapiclient_mod = types.ModuleType("googleapiclient")
     discovery_mod = types.ModuleType("googleapiclient.discovery")
@@ -172,53 +119,81 @@ def gs_module(monkeypatch):
             self.resp = types.SimpleNamespace(status=500, reason="error")
             self.content = content
     errors_mod.HttpError = HttpError
-    monkeypatch.setitem(sys.modules, "googleapiclient", googleapiclient_mod)
-    monkeypatch.setitem(sys.modules, "googleapiclient.discovery", discovery_mod)
-    monkeypatch.setitem(sys.modules, "googleapiclient.errors", errors_mod)
+    stubs["googleapiclient"] = googleapiclient_mod
+    stubs["googleapiclient.discovery"] = discovery_mod
+    stubs["googleapiclient.errors"] = errors_mod
 
     api_core_mod = types.ModuleType("google.api_core")
     exceptions_mod = types.ModuleType("google.api_core.exceptions")
     class NotFound(Exception):
         pass
     exceptions_mod.NotFound = NotFound
-    monkeypatch.setitem(sys.modules, "google.api_core", api_core_mod)
-    monkeypatch.setitem(sys.modules, "google.api_core.exceptions", exceptions_mod)
+    stubs["google.api_core"] = api_core_mod
+    stubs["google.api_core.exceptions"] = exceptions_mod
+    return stubs
+
+
+# stubs and the google_services import are built once per module; see gs_module
+@pytest.fixture(scope="module")
+def gs_base():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        for name, module in _build_stubs().items():
+            monkeypatch.setitem(sys.modules, name, module)
 
-    if "google_services" in sys.modules:
-        del sys.modules["google_services"]
-    gs = importlib.import_module("google_services")
-    return gs
+        # import google_services and the services it wires up against the
+        # stubs above; the context puts back any previously imported copies
+        for name in ("google_services", "services.pending", "services.preferences"):
+            monkeypatch.delitem(sys.modules, name, raising=False)
+        gs = importlib.import_module("google_services")
+        yield gs
+
+
+@pytest.fixture
+def gs_module(gs_base):
+    # empty the shared FakeDB in place; google_services and its services
+    # hold references to these collections from import time
+    for collection in gs_base.db.collections.values():
+        collection.store.clear()
+        collection.subcollections.clear()
+    return gs_base
 
 # ---- Tests ----
+# each test drives all of its awaits from one coroutine on a single event loop
 
-def test_pending_event_flow(gs_module):
+def test_pending_event_and_deletion_flows(gs_module):
     gs = gs_module
-    user_id = 1
     event = {"id": "abc"}
-    assert asyncio.run(gs.add_pending_event(user_id, event))
-    fetched = asyncio.run(gs.get_pending_event(user_id))
-    assert fetched == event
-    assert asyncio.run(gs.delete_pending_event(user_id))
-    assert asyncio.run(gs.get_pending_event(user_id)) is None
+    deletion = {"event_id": "xyz"}
 
+    async def event_flow(user_id):
+        assert await gs.add_pending_event(user_id, event)
+        assert await gs.get_pending_event(user_id) == event
+        assert await gs.delete_pending_event(user_id)
+        assert await gs.get_pending_event(user_id) is None
 
-def test_pending_deletion_flow(gs_module):
-    gs = gs_module
-    user_id = 1
-    deletion = {"event_id": "xyz"}
-    assert asyncio.run(gs.add_pending_deletion(user_id, deletion))
-    fetched = asyncio.run(gs.get_pending_deletion(user_id))
-    assert fetched == deletion
-    assert asyncio.run(gs.delete_pending_deletion(user_id))
-    assert asyncio.run(gs.get_pending_deletion(user_id)) is None
+    async def deletion_flow(user_id):
+        assert await gs.add_pending_deletion(user_id, deletion)
+        assert await gs.get_pending_deletion(user_id) == deletion
+        assert await gs.delete_pending_deletion(user_id)
+        assert await gs.get_pending_deletion(user_id) is None
+
+    # independent users and collections, so the flows can run concurrently
+    async def flows():
+        await asyncio.gather(event_flow(1), deletion_flow(5))
+
+    asyncio.run(flows())
 
 
 def test_timezone_set_get(gs_module):
     gs = gs_module
     user_id = 2
-    assert asyncio.run(gs.set_user_timezone(user_id, "UTC"))
-    assert asyncio.run(gs.get_user_timezone_str(user_id)) == "UTC"
-    assert not asyncio.run(gs.set_user_timezone(user_id, "Invalid/Zone"))
+
+    async def flow():
+        assert await gs.set_user_timezone(user_id, "UTC")
+        assert await gs.get_user_timezone_str(user_id) == "UTC"
+        assert not await gs.set_user_timezone(user_id, "Invalid/Zone")
+
+    asyncio.run(flow())
 
 
 def test_oauth_state_flow(gs_module):
@@ -238,7 +213,11 @@ def test_user_token_flow(gs_module):
         def to_json(self):
             return "{}"
     creds = Creds()
-    assert asyncio.run(gs.store_user_credentials(user_id, creds))
-    assert asyncio.run(gs.is_user_connected(user_id))
-    assert asyncio.run(gs.delete_user_token(user_id))
-    assert not asyncio.run(gs.is_user_connected(user_id))
+
+    async def flow():
+        assert await gs.store_user_credentials(user_id, creds)
+        assert await gs.is_user_connected(user_id)
+        assert await gs.delete_user_token(user_id)
+        assert not await gs.is_user_connected(user_id)
+
+    asyncio.run(flow())
@@ -1,57 +1,19 @@
 import sys
 import types
-import importlib
+import importlib.util
 import asyncio
+from pathlib import Path
 
 import pytest
 
-# ---- Fake Firestore Implementation ----
-
-class FakeArrayUnion:
-    def __init__(self, items):
-        self.items = list(items)
-
-class FakeSnapshot:
-    def __init__(self, data):
-        self._data = data
-    @property
-    def exists(self):
-        return self._data is not None
-    def to_dict(self):
-        return self._data
-
-class FakeDocument:
-    def __init__(self, collection, doc_id):
-        self.collection = collection
-        self.doc_id = doc_id
-    def get(self):
-        data = self.collection.store.get(self.doc_id)
-        return FakeSnapshot(data)
-    def set(self, data, merge=False):
-        existing = self.collection.store.get(self.doc_id, {}) if merge else {}
-        for key, value in data.items():
-            if isinstance(value, FakeArrayUnion):
-                items = existing.get(key, [])
-                for item in value.items:
-                    if item not in items:
-                        items.append(item)
-                existing[key] = items
-            else:
-                existing[key] = value
-        self.collection.store[self.doc_id] = existing
-    def delete(self):
-        self.collection.store.pop(self.doc_id, None)
-
-class FakeCollection:
-    def __init__(self):
-        self.store = {}
-    def document(self, doc_id):
-        return FakeDocument(self, doc_id)
-
-# ---- Pytest Fixture ----
+from tests.fakes import FakeArrayUnion, FakeCollection
 
-@pytest.fixture
-def gs_module(monkeypatch):
+_GROCERY_SERVICES_PATH = Path(__file__).resolve().parent.parent / "grocery_services.py"
+
+# stand-in modules for grocery_services and its third-party imports, keyed
+# by sys.modules name
+def _build_stubs():
+    stubs = {}
     # stub config before importing grocery_services
     config_mod = types.ModuleType("config")
     config_mod.FIRESTORE_DB = None
@@ -66,7 +28,7 @@ def gs_module(monkeypatch):
     config_mod.FS_COLLECTION_GENERAL_CHAT_HISTORIES = "gc"
     config_mod.GOOGLE_CALENDAR_SCOPES = []
     config_mod.OAUTH_REDIRECT_URI = "http://localhost"
-    monkeypatch.setitem(sys.modules, "config", config_mod)
+    stubs["config"] = config_mod
 
     # dummy pytz module
     pytz_mod = types.ModuleType("pytz")
@@ -75,28 +37,28 @@ def gs_module(monkeypatch):
     pytz_mod.UnknownTimeZoneError = UnknownTimeZoneError
     pytz_mod.timezone = lambda name: name
     pytz_mod.utc = "UTC"
-    monkeypatch.setitem(sys.modules, "pytz", pytz_mod)
-    monkeypatch.setitem(sys.modules, "pytz.exceptions", types.SimpleNamespace(UnknownTimeZoneError=UnknownTimeZoneError))
+    stubs["pytz"] = pytz_mod
+    stubs["pytz.exceptions"] = types.SimpleNamespace(UnknownTimeZoneError=UnknownTimeZoneError)
 
     # minimal dateutil module
     dateutil_mod = types.ModuleType("dateutil")
     parser_mod = types.ModuleType("dateutil.parser")
     parser_mod.isoparse = lambda s: s
-    monkeypatch.setitem(sys.modules, "dateutil", dateutil_mod)
-    monkeypatch.setitem(sys.modules, "dateutil.parser", parser_mod)
+    stubs["dateutil"] = dateutil_mod
+    stubs["dateutil.parser"] = parser_mod
 
     # minimal pydantic module
     pydantic_mod = types.ModuleType("pydantic")
     class BaseModel:
         pass
     pydantic_mod.BaseModel = BaseModel
-    monkeypatch.setitem(sys.modules, "pydantic", pydantic_mod)
+    stubs["pydantic"] = pydantic_mod
 
     # stub google packages used during import
     google_pkg = types.ModuleType("google")
-    monkeypatch.setitem(sys.modules, "google", google_pkg)
+    stubs["google"] = google_pkg
     google_pkg.cloud = types.ModuleType("google.cloud")
-    monkeypatch.setitem(sys.modules, "google.cloud", google_pkg.cloud)
+    stubs["google.cloud"] = google_pkg.cloud
     firestore_mod = types.ModuleType("google.cloud.firestore")
     firestore_mod.ArrayUnion = FakeArrayUnion
     firestore_mod.SERVER_TIMESTAMP = object()
@@ -105,35 +67,35 @@ def gs_module(monkeypatch):
             return func(*args, **kwargs)
         return wrapper
     firestore_mod.transactional = transactional
-    monkeypatch.setitem(sys.modules, "google.cloud.firestore", firestore_mod)
+    stubs["google.cloud.firestore"] = firestore_mod
     google_pkg.cloud.firestore = firestore_mod
     firestore_v1_mod = types.ModuleType("google.cloud.firestore_v1")
     base_query_mod = types.ModuleType("google.cloud.firestore_v1.base_query")
     base_query_mod.FieldFilter = object
-    monkeypatch.setitem(sys.modules, "google.cloud.firestore_v1", firestore_v1_mod)
-    monkeypatch.setitem(sys.modules, "google.cloud.firestore_v1.base_query", base_query_mod)
+    stubs["google.cloud.firestore_v1"] = firestore_v1_mod
+    stubs["google.cloud.firestore_v1.base_query"] = base_query_mod
     secret_mod = types.ModuleType("google.cloud.secretmanager")
-    monkeypatch.setitem(sys.modules, "google.cloud.secretmanager", secret_mod)
+    stubs["google.cloud.secretmanager"] = secret_mod
 
     google_pkg.oauth2 = types.ModuleType("google.oauth2")
     cred_mod = types.ModuleType("google.oauth2.credentials")
     cred_mod.Credentials = object
-    monkeypatch.setitem(sys.modules, "google.oauth2", google_pkg.oauth2)
-    monkeypatch.setitem(sys.modules, "google.oauth2.credentials", cred_mod)
+    stubs["google.oauth2"] = google_pkg.oauth2
+    stubs["google.oauth2.credentials"] = cred_mod
 
     google_auth_mod = types.ModuleType("google_auth_oauthlib")
     flow_mod = types.ModuleType("google_auth_oauthlib.flow")
     flow_mod.Flow = object
-    monkeypatch.setitem(sys.modules, "google_auth_oauthlib", google_auth_mod)
-    monkeypatch.setitem(sys.modules, "google_auth_oauthlib.flow", flow_mod)
+    stubs["google_auth_oauthlib"] = google_auth_mod
+    stubs["google_auth_oauthlib.flow"] = flow_mod
 
     google_pkg.auth = types.ModuleType("google.auth")
     google_pkg.auth.transport = types.ModuleType("google.auth.transport")
     requests_mod = types.ModuleType("google.auth.transport.requests")
     requests_mod.Request = object
-    monkeypatch.setitem(sys.modules, "google.auth", google_pkg.auth)
-    monkeypatch.setitem(sys.modules, "google.auth.transport", google_pkg.auth.transport)
-    monkeypatch.setitem(sys.modules, "google.auth.transport.requests", requests_mod)
+    stubs["google.auth"] = google_pkg.auth
+    stubs["google.auth.transport"] = google_pkg.auth.transport
+    stubs["google.auth.transport.requests"] = requests_mod
 
     googleapiclient_mod = types.ModuleType("googleapiclient")
     discovery_mod = types.ModuleType("googleapiclient.discovery")
@@ -144,31 +106,45 @@ def gs_module(monkeypatch):
             self.resp = types.SimpleNamespace(status=500, reason="error")
             self.content = content
     errors_mod.HttpError = HttpError
-    monkeypatch.setitem(sys.modules, "googleapiclient", googleapiclient_mod)
-    monkeypatch.setitem(sys.modules, "googleapiclient.discovery", discovery_mod)
-    monkeypatch.setitem(sys.modules, "googleapiclient.errors", errors_mod)
+    stubs["googleapiclient"] = googleapiclient_mod
+    stubs["googleapiclient.discovery"] = discovery_mod
+    stubs["googleapiclient.errors"] = errors_mod
 
     api_core_mod = types.ModuleType("google.api_core")
     exceptions_mod = types.ModuleType("google.api_core.exceptions")
     class NotFound(Exception):
         pass
     exceptions_mod.NotFound = NotFound
-    monkeypatch.setitem(sys.modules, "google.api_core", api_core_mod)
-    monkeypatch.setitem(sys.modules, "google.api_core.exceptions", exceptions_mod)
+    stubs["google.api_core"] = api_core_mod
+    stubs["google.api_core.exceptions"] = exceptions_mod
+    return stubs
+
+
+# stubs and the grocery_services import are built once per module; see gs_module
+@pytest.fixture(scope="module")
+def gs_base():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        for name, module in _build_stubs().items():
+            monkeypatch.setitem(sys.modules, name, module)
 
-    # ensure clean import
-    if "grocery_services" in sys.modules:
-        del sys.modules["grocery_services"]
-    gs = importlib.import_module("grocery_services")
+        # load a private copy of grocery_services against the stubs above,
+        # leaving any sys.modules entry other suites imported untouched
+        spec = importlib.util.spec_from_file_location("grocery_services", _GROCERY_SERVICES_PATH)
+        gs = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(gs)
+        monkeypatch.setattr(gs, "firestore", types.SimpleNamespace(ArrayUnion=FakeArrayUnion))
+        yield gs
 
-    # replace the Firestore collection with our fake implementation
-    fake_collection = FakeCollection()
-    monkeypatch.setattr(gs, "FS_COLLECTION_GROCERY_LISTS", fake_collection)
-    monkeypatch.setattr(gs, "FS_COLLECTION_GROCERY_GROUPS", FakeCollection())
-    monkeypatch.setattr(gs, "firestore", types.SimpleNamespace(ArrayUnion=FakeArrayUnion))
-    return gs
+
+@pytest.fixture
+def gs_module(gs_base):
+    # replace the Firestore collections with fresh fake implementations
+    gs_base.FS_COLLECTION_GROCERY_LISTS = FakeCollection()
+    gs_base.FS_COLLECTION_GROCERY_GROUPS = FakeCollection()
+    return gs_base
 
 # ---- Tests ----
+# each test drives all of its awaits from one coroutine on a single event loop
 
 def test_grocery_list_flow(gs_module):
     gs = gs_module
@@ -183,13 +159,16 @@ def test_merge_grocery_lists(gs_module):
     gs = gs_module
     user_a = 1
     user_b = 2
-    asyncio.run(gs.add_to_grocery_list(user_a, ["apples"]))
-    asyncio.run(gs.add_to_grocery_list(user_b, ["bananas"]))
-    success = asyncio.run(gs.merge_grocery_lists(user_a, user_b))
-    assert success
-    list_a = asyncio.run(gs.get_grocery_list(user_a))
-    list_b = asyncio.run(gs.get_grocery_list(user_b))
-    assert sorted(list_a) == sorted(list_b) == ["apples", "bananas"]
-    asyncio.run(gs.add_to_grocery_list(user_a, ["carrots"]))
-    list_b_after = asyncio.run(gs.get_grocery_list(user_b))
-    assert "carrots" in list_b_after
+
+    async def flow():
+        await gs.add_to_grocery_list(user_a, ["apples"])
+        await gs.add_to_grocery_list(user_b, ["bananas"])
+        assert await gs.merge_grocery_lists(user_a, user_b)
+        list_a = await gs.get_grocery_list(user_a)
+        list_b = await gs.get_grocery_list(user_b)
+        assert len(list_a) == len(list_b) == 2
+        assert set(list_a) == set(list_b) == {"apples", "bananas"}
+        await gs.add_to_grocery_list(user_a, ["carrots"])
+        assert "carrots" in await gs.get_grocery_list(user_b)
+
+    asyncio.run(flow())
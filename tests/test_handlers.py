@@ -1,46 +1,24 @@
 import sys
 import types
-import zoneinfo
+import logging
 import importlib
 from unittest.mock import AsyncMock, MagicMock
 import asyncio
 
 import pytest
 
-# provide a minimal pytz replacement since package may not be installed
-class DummyPytzModule(types.ModuleType):
-    class UnknownTimeZoneError(Exception):
-        pass
-
-    class BaseTzInfo(zoneinfo.ZoneInfo):
-        pass
-
-    def timezone(self, name: str):
-        try:
-            return zoneinfo.ZoneInfo(name)
-        except Exception:
-            raise self.UnknownTimeZoneError
+# check captured records directly instead of searching the joined caplog.text
+def _logged(caplog, level, needle):
+    return any(r.levelno == level and needle in r.getMessage() for r in caplog.records)
 
-    utc = zoneinfo.ZoneInfo("UTC")
+# lightweight update for user 1 whose message carries the given attributes
+def _make_update(user=None, **message_attrs):
+    user = user or types.SimpleNamespace(id=1)
+    return types.SimpleNamespace(effective_user=user, message=types.SimpleNamespace(**message_attrs))
 
 # fixture that loads handlers with patched pytz
 @pytest.fixture
-def handlers_module(monkeypatch):
-    dummy = DummyPytzModule("pytz")
-    monkeypatch.setitem(sys.modules, "pytz", dummy)
-    exc_mod = types.ModuleType("pytz.exceptions")
-    exc_mod.UnknownTimeZoneError = dummy.UnknownTimeZoneError
-    monkeypatch.setitem(sys.modules, "pytz.exceptions", exc_mod)
-    # minimal dateutil.parser replacement
-    parser_mod = types.ModuleType("dateutil.parser")
-    def isoparse(s: str):
-        from datetime import datetime
-        if s.endswith("Z"):
-            s = s[:-1] + "+00:00"
-        return datetime.fromisoformat(s)
-    parser_mod.isoparse = isoparse
-    monkeypatch.setitem(sys.modules, "dateutil", types.ModuleType("dateutil"))
-    monkeypatch.setitem(sys.modules, "dateutil.parser", parser_mod)
+def handlers_module(monkeypatch, pytz_stub, dateutil_stub):
     # stub config module
     config_mod = types.ModuleType("config")
     config_mod.TELEGRAM_BOT_TOKEN = ""
@@ -53,21 +31,22 @@ def handlers_module(monkeypatch):
     async def async_noop(*args, **kwargs):
         return None
     gs_mod.get_user_timezone_str = async_noop
-    sys.modules["google_services"] = gs_mod
+    # also provide names imported separately
+    gs_mod.add_pending_event = async_noop
+    gs_mod.get_pending_event = async_noop
+    gs_mod.delete_pending_event = async_noop
+    gs_mod.add_pending_deletion = async_noop
+    gs_mod.get_pending_deletion = async_noop
+    gs_mod.delete_pending_deletion = async_noop
+    monkeypatch.setitem(sys.modules, "google_services", gs_mod)
     cal_mod = types.ModuleType("calendar_services")
     cal_mod.get_calendar_event_by_id = async_noop
     cal_mod.create_calendar_event = async_noop
     cal_mod.delete_calendar_event = async_noop
     cal_mod.get_calendar_events = async_noop
     cal_mod.search_calendar_events = async_noop
-    sys.modules["calendar_services"] = cal_mod
-    # also provide names imported separately
-    sys.modules["google_services"].add_pending_event = async_noop
-    sys.modules["google_services"].get_pending_event = async_noop
-    sys.modules["google_services"].delete_pending_event = async_noop
-    sys.modules["google_services"].add_pending_deletion = async_noop
-    sys.modules["google_services"].get_pending_deletion = async_noop
-    sys.modules["google_services"].delete_pending_deletion = async_noop
+    monkeypatch.setitem(sys.modules, "calendar_services", cal_mod)
+    monkeypatch.setitem(sys.modules, "grocery_services", types.ModuleType("grocery_services"))
     # minimal telegram modules
     telegram_mod = types.ModuleType("telegram")
     class Update: pass
@@ -109,18 +88,18 @@ def handlers_module(monkeypatch):
     agent_mod.initialize_agent = lambda *args, **kwargs: None
     llm_pkg.llm_service = llm_service_mod
     llm_pkg.agent = agent_mod
-    sys.modules["llm"] = llm_pkg
-    sys.modules["llm.llm_service"] = llm_service_mod
-    sys.modules["llm.agent"] = agent_mod
+    monkeypatch.setitem(sys.modules, "llm", llm_pkg)
+    monkeypatch.setitem(sys.modules, "llm.llm_service", llm_service_mod)
+    monkeypatch.setitem(sys.modules, "llm.agent", agent_mod)
     # stub utils module
     utils_mod = types.ModuleType("utils")
     utils_mod._format_event_time = lambda *args, **kwargs: ""
     utils_mod.escape_markdown_v2 = lambda text: text
-    sys.modules["utils"] = utils_mod
+    monkeypatch.setitem(sys.modules, "utils", utils_mod)
     # stub handler.message_formatter
     msg_mod = types.ModuleType("handler.message_formatter")
     msg_mod.create_final_message = lambda data: ""
-    sys.modules["handler.message_formatter"] = msg_mod
+    monkeypatch.setitem(sys.modules, "handler.message_formatter", msg_mod)
     handlers = importlib.import_module("handlers")
     return handlers
 
@@ -141,80 +120,52 @@ def test_format_iso_datetime_for_display_invalid_timezone(handlers_module, caplo
     iso = "2024-01-01T12:00:00+00:00"
     result = handlers_module._format_iso_datetime_for_display(iso, "Invalid/Zone")
     assert result.endswith("UTC")
-    assert "Unknown timezone string" in caplog.text
+    assert _logged(caplog, logging.WARNING, "Unknown timezone string 'Invalid/Zone'")
 
 
 # ---------- Tests for _get_user_tz_or_prompt ----------
-def test_get_user_tz_or_prompt_returns_timezone(handlers_module, monkeypatch):
-    mock_update = MagicMock()
-    mock_message = MagicMock()
-    mock_update.effective_user.id = 1
-    mock_update.message = mock_message
-    mock_message.reply_text = AsyncMock()
-
-    mock_context = MagicMock()
-
-    monkeypatch.setattr(handlers_module.gs, "get_user_timezone_str", AsyncMock(return_value="UTC"))
-
-    tz = asyncio.run(handlers_module._get_user_tz_or_prompt(mock_update, mock_context))
-
-    assert tz.key == "UTC"
-    mock_message.reply_text.assert_not_called()
-
-
-def test_get_user_tz_or_prompt_prompts_when_missing(handlers_module, monkeypatch):
-    mock_update = MagicMock()
-    mock_message = MagicMock()
-    mock_update.effective_user.id = 1
-    mock_update.message = mock_message
-    mock_message.reply_text = AsyncMock()
-
-    mock_context = MagicMock()
+@pytest.mark.parametrize(
+    "stored_tz,expected_key,prompts",
+    [("UTC", "UTC", 0), (None, None, 1)],
+    ids=["returns_timezone", "prompts_when_missing"],
+)
+def test_get_user_tz_or_prompt(handlers_module, monkeypatch, stored_tz, expected_key, prompts):
+    mock_update = _make_update(reply_text=AsyncMock())
+    mock_context = types.SimpleNamespace()
 
-    monkeypatch.setattr(handlers_module.gs, "get_user_timezone_str", AsyncMock(return_value=None))
+    monkeypatch.setattr(handlers_module.gs, "get_user_timezone_str", AsyncMock(return_value=stored_tz))
 
     tz = asyncio.run(handlers_module._get_user_tz_or_prompt(mock_update, mock_context))
 
-    assert tz is None
-    mock_message.reply_text.assert_called_once()
+    if expected_key is None:
+        assert tz is None
+    else:
+        assert tz.key == expected_key
+    assert mock_update.message.reply_text.call_count == prompts
 
 
 # ---------- Test for start command ----------
 def test_start_sends_welcome_message(handlers_module):
-    mock_update = MagicMock()
-    mock_user = MagicMock()
-    mock_user.id = 1
-    mock_user.username = "tester"
-    mock_user.mention_html.return_value = "<a>tester</a>"
-    mock_update.effective_user = mock_user
-
-    mock_message = MagicMock()
-    mock_message.reply_html = AsyncMock()
-    mock_update.message = mock_message
-
-    mock_context = MagicMock()
+    mock_user = types.SimpleNamespace(id=1, username="tester", mention_html=lambda: "<a>tester</a>")
+    mock_update = _make_update(mock_user, reply_html=AsyncMock())
+    mock_context = types.SimpleNamespace()
 
     asyncio.run(handlers_module.start(mock_update, mock_context))
 
-    mock_message.reply_html.assert_called_once()
+    mock_update.message.reply_html.assert_called_once()
 
 
 def test_menu_command_shows_keyboard(handlers_module):
-    mock_update = MagicMock()
-    mock_message = MagicMock()
-    mock_message.reply_text = AsyncMock()
-    mock_update.message = mock_message
-    mock_update.effective_user = MagicMock()
-
-    mock_context = MagicMock()
+    mock_update = _make_update(reply_text=AsyncMock())
+    mock_context = types.SimpleNamespace()
 
     asyncio.run(handlers_module.menu_command(mock_update, mock_context))
 
-    mock_message.reply_text.assert_called_once()
+    mock_update.message.reply_text.assert_called_once()
 
 
-def test_handle_message_photo_caption(monkeypatch, handlers_module):
-    # patch google services
+# stub the services and agent used by handle_message; returns what the agent received
+def _patch_chat_dependencies(monkeypatch, handlers_module):
     monkeypatch.setattr(handlers_module.gs, "is_user_connected", AsyncMock(return_value=True), raising=False)
     monkeypatch.setattr(handlers_module.gs, "get_user_timezone_str", AsyncMock(return_value="UTC"), raising=False)
     monkeypatch.setattr(handlers_module.gs, "get_chat_history", AsyncMock(return_value=[]), raising=False)
@@ -230,31 +181,36 @@ def test_handle_message_photo_caption(monkeypatch, handlers_module):
         raising=False,
     )
 
-    # patch LLM service and agent
-    extract_mock = AsyncMock(return_value="image text")
-    monkeypatch.setattr(handlers_module.chat.llm_service, "extract_text_from_image", extract_mock, raising=False)
-
     called = {}
+
     class DummyExecutor:
         async def ainvoke(self, data):
             called["input"] = data
             return {"output": "agent reply"}
 
     monkeypatch.setattr(handlers_module.chat, "initialize_agent", lambda *a, **k: DummyExecutor())
+    return called
+
+
+def test_handle_message_photo_caption(monkeypatch, handlers_module):
+    called = _patch_chat_dependencies(monkeypatch, handlers_module)
+
+    # patch LLM service
+    extract_mock = AsyncMock(return_value="image text")
+    monkeypatch.setattr(handlers_module.chat.llm_service, "extract_text_from_image", extract_mock, raising=False)
 
     # build update with photo and caption
     dummy_file = types.SimpleNamespace(download_as_bytearray=AsyncMock(return_value=b"img"))
     dummy_photo = types.SimpleNamespace(get_file=AsyncMock(return_value=dummy_file))
-    message = MagicMock()
-    message.text = None
-    message.caption = "caption"
-    message.photo = [dummy_photo]
-    message.chat = types.SimpleNamespace(send_action=AsyncMock())
-    message.reply_text = AsyncMock()
+    message = MagicMock(
+        text=None,
+        caption="caption",
+        photo=[dummy_photo],
+        chat=types.SimpleNamespace(send_action=AsyncMock()),
+        reply_text=AsyncMock(),
+    )
 
-    update = MagicMock()
-    update.message = message
-    update.effective_user.id = 1
+    update = MagicMock(message=message, **{"effective_user.id": 1})
 
     context = MagicMock()
 
@@ -266,47 +222,24 @@ def test_handle_message_photo_caption(monkeypatch, handlers_module):
 
 
 def test_handle_message_voice(monkeypatch, handlers_module):
-    monkeypatch.setattr(handlers_module.gs, "is_user_connected", AsyncMock(return_value=True), raising=False)
-    monkeypatch.setattr(handlers_module.gs, "get_user_timezone_str", AsyncMock(return_value="UTC"), raising=False)
-    monkeypatch.setattr(handlers_module.gs, "get_chat_history", AsyncMock(return_value=[]), raising=False)
-    monkeypatch.setattr(handlers_module.gs, "add_chat_message", AsyncMock(), raising=False)
-    monkeypatch.setattr(handlers_module, "get_pending_event", AsyncMock(return_value=None), raising=False)
-    monkeypatch.setattr(handlers_module, "delete_pending_event", AsyncMock(), raising=False)
-    monkeypatch.setattr(handlers_module, "get_pending_deletion", AsyncMock(return_value=None), raising=False)
-    monkeypatch.setattr(handlers_module, "delete_pending_deletion", AsyncMock(), raising=False)
-    monkeypatch.setattr(
-        handlers_module.chat.cs,
-        "get_calendar_event_by_id",
-        AsyncMock(return_value=None),
-        raising=False,
-    )
+    called = _patch_chat_dependencies(monkeypatch, handlers_module)
 
     transcribe_mock = AsyncMock(return_value="voice text")
     monkeypatch.setattr(handlers_module.chat.llm_service, "transcribe_audio", transcribe_mock, raising=False)
 
-    called = {}
-
-    class DummyExecutor:
-        async def ainvoke(self, data):
-            called["input"] = data
-            return {"output": "agent reply"}
-
-    monkeypatch.setattr(handlers_module.chat, "initialize_agent", lambda *a, **k: DummyExecutor())
-
     dummy_file = types.SimpleNamespace(download_as_bytearray=AsyncMock(return_value=b"audio"))
     dummy_voice = types.SimpleNamespace(get_file=AsyncMock(return_value=dummy_file))
-    message = MagicMock()
-    message.text = None
-    message.caption = None
-    message.photo = []
-    message.voice = dummy_voice
-    message.audio = None
-    message.chat = types.SimpleNamespace(send_action=AsyncMock())
-    message.reply_text = AsyncMock()
-
-    update = MagicMock()
-    update.message = message
-    update.effective_user.id = 1
+    message = MagicMock(
+        text=None,
+        caption=None,
+        photo=[],
+        voice=dummy_voice,
+        audio=None,
+        chat=types.SimpleNamespace(send_action=AsyncMock()),
+        reply_text=AsyncMock(),
+    )
+
+    update = MagicMock(message=message, **{"effective_user.id": 1})
 
     context = MagicMock()
 
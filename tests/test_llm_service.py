@@ -6,8 +6,8 @@ from unittest.mock import AsyncMock
 
 
 def setup_llm(monkeypatch, response):
-    sys.modules.pop("llm", None)
-    sys.modules.pop("llm.llm_service", None)
+    monkeypatch.delitem(sys.modules, "llm", raising=False)
+    monkeypatch.delitem(sys.modules, "llm.llm_service", raising=False)
     # stub packages required during import
     google_mod = types.ModuleType("google")
     genai_mod = types.ModuleType("google.genai")
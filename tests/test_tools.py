@@ -3,41 +3,12 @@ import types
 import importlib
 import zoneinfo
 import asyncio
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock
 
 import pytest
 
-class DummyPytzModule(types.ModuleType):
-    class UnknownTimeZoneError(Exception):
-        pass
-
-    class BaseTzInfo(zoneinfo.ZoneInfo):
-        pass
-
-    def timezone(self, name: str):
-        try:
-            return zoneinfo.ZoneInfo(name)
-        except Exception:
-            raise self.UnknownTimeZoneError
-
-    utc = zoneinfo.ZoneInfo("UTC")
-
-
 @pytest.fixture
-def tools(monkeypatch):
-    dummy = DummyPytzModule("pytz")
-    monkeypatch.setitem(sys.modules, "pytz", dummy)
-    exc_mod = types.ModuleType("pytz.exceptions")
-    exc_mod.UnknownTimeZoneError = dummy.UnknownTimeZoneError
-    monkeypatch.setitem(sys.modules, "pytz.exceptions", exc_mod)
-
-    parser_mod = types.ModuleType("dateutil.parser")
-    def isoparse(s: str):
-        from datetime import datetime
-        if s.endswith("Z"):
-            s = s[:-1] + "+00:00"
-        return datetime.fromisoformat(s)
-    parser_mod.isoparse = isoparse
+def tools(monkeypatch, pytz_stub, dateutil_stub):
     relativedelta_mod = types.ModuleType("dateutil.relativedelta")
     class relativedelta:
         def __init__(self, *args, **kwargs):
@@ -47,10 +18,6 @@ def tools(monkeypatch):
             self.hours = kwargs.get("hours", 0)
             self.minutes = kwargs.get("minutes", 0)
     relativedelta_mod.relativedelta = relativedelta
-    dateutil_pkg = types.ModuleType("dateutil")
-    dateutil_pkg.__path__ = []
-    monkeypatch.setitem(sys.modules, "dateutil", dateutil_pkg)
-    monkeypatch.setitem(sys.modules, "dateutil.parser", parser_mod)
     monkeypatch.setitem(sys.modules, "dateutil.relativedelta", relativedelta_mod)
 
     pydantic_mod = types.ModuleType("pydantic")
@@ -85,17 +52,6 @@ def tools(monkeypatch):
     monkeypatch.setitem(sys.modules, "config", config_mod)
 
     gs_mod = types.ModuleType("grocery_services")
-    from unittest.mock import MagicMock
-
-    async def async_true(*args, **kwargs):
-        return True
-
-    async def async_list(*args, **kwargs):
-        return ["milk"]
-
-    gs_mod.add_to_grocery_list = async_true
-    gs_mod.delete_grocery_list = async_true
-    gs_mod.get_grocery_list = MagicMock(side_effect=async_list)
     gs_mod.add_pending_event = AsyncMock(return_value=True)
     gs_mod.delete_pending_deletion = lambda *a, **k: None
     gs_mod.get_calendar_event_by_id = AsyncMock(return_value={
@@ -108,9 +64,9 @@ def tools(monkeypatch):
     gs_mod.delete_pending_event = lambda *a, **k: None
     gs_mod.get_calendar_events = AsyncMock(return_value=[{"id": "ev1"}])
     gs_mod.search_calendar_events = AsyncMock(return_value=[{"id": "ev2"}])
-    sys.modules["google_services"] = gs_mod
-    sys.modules["grocery_services"] = gs_mod
-    sys.modules["calendar_services"] = gs_mod
+    monkeypatch.setitem(sys.modules, "google_services", gs_mod)
+    monkeypatch.setitem(sys.modules, "grocery_services", gs_mod)
+    monkeypatch.setitem(sys.modules, "calendar_services", gs_mod)
 
     llm_service_mod = types.ModuleType("llm.llm_service")
     llm_service_mod.extract_create_args_llm = AsyncMock(return_value={
@@ -129,74 +85,85 @@ def tools(monkeypatch):
         "start_iso": "2024-01-01T00:00:00+00:00",
         "end_iso": "2024-01-02T00:00:00+00:00",
     })
-    if "llm" in sys.modules:
-        del sys.modules["llm"]
-    import importlib
+    monkeypatch.delitem(sys.modules, "llm", raising=False)
     llm_pkg = importlib.import_module("llm")
     monkeypatch.setattr(llm_pkg, "llm_service", llm_service_mod, raising=False)
-    sys.modules["llm.llm_service"] = llm_service_mod
+    monkeypatch.setitem(sys.modules, "llm.llm_service", llm_service_mod)
 
     utils_mod = types.ModuleType("utils")
     utils_mod._format_event_time = lambda *a, **k: "formatted time"
-    sys.modules["utils"] = utils_mod
+    monkeypatch.setitem(sys.modules, "utils", utils_mod)
 
     fmt_mod = importlib.import_module("llm.tools.formatting")
     monkeypatch.setattr(fmt_mod, "format_event_list_for_agent", lambda *a, **k: "formatted events")
 
-    modules = {}
-    names = [
-        "add_grocery_item_tool",
-        "clear_grocery_list_tool",
-        "show_grocery_list_tool",
-        "get_current_time_tool",
-        "create_calendar",
-        "delete_calendar",
-        "read_calendar",
-        "search_calendar",
-    ]
-    for name in names:
-        mod = importlib.import_module(f"llm.tools.{name}")
-        importlib.reload(mod)
-        modules[name] = mod
-    return modules
-
-def test_add_grocery_item_success(tools):
+    # import a tool module only when a test asks for it
+    class ToolModules(dict):
+        def __missing__(self, name):
+            mod = importlib.import_module(f"llm.tools.{name}")
+            self[name] = mod
+            return mod
+
+    return ToolModules()
+
+@pytest.mark.parametrize(
+    "items,service,expected,parsed",
+    [
+        ("eggs, bread", {"return_value": True}, "Successfully added", ["eggs", "bread"]),
+        ("  cheese  , bread  ", {"return_value": True}, "Successfully added: cheese, bread to", ["cheese", "bread"]),
+        ("", {"return_value": True}, "Input error", None),
+        (" , , ", {"return_value": True}, "Input error: No valid items", None),
+        ("eggs", {"return_value": False}, "Failed to add items", ["eggs"]),
+        ("eggs", {"side_effect": Exception("boom")}, "An unexpected error", ["eggs"]),
+    ],
+    ids=["success", "strips_whitespace", "invalid", "no_valid_items", "service_failure", "service_exception"],
+)
+def test_add_grocery_item(tools, monkeypatch, items, service, expected, parsed):
+    add_mock = AsyncMock(**service)
+    monkeypatch.setattr(sys.modules["grocery_services"], "add_to_grocery_list", add_mock, raising=False)
     tool_cls = tools["add_grocery_item_tool"].AddGroceryItemTool
     tool = tool_cls(user_id=1, user_timezone_str="UTC")
-    result = tool._run("eggs, bread")
-    assert "Successfully added" in result
-
-
-def test_add_grocery_item_invalid(tools):
-    tool_cls = tools["add_grocery_item_tool"].AddGroceryItemTool
-    tool = tool_cls(user_id=1, user_timezone_str="UTC")
-    result = tool._run("")
-    assert result.startswith("Input error")
-
-
-def test_clear_grocery_list(tools):
+    result = tool._run(items)
+    assert result.startswith(expected)
+    if parsed is None:
+        add_mock.assert_not_awaited()
+    else:
+        add_mock.assert_awaited_once_with(1, parsed)
+
+
+@pytest.mark.parametrize(
+    "service,expected",
+    [
+        ({"return_value": True}, "Successfully cleared"),
+        ({"return_value": False}, "Failed to clear"),
+        ({"side_effect": Exception("boom")}, "An unexpected error"),
+    ],
+    ids=["success", "service_failure", "service_exception"],
+)
+def test_clear_grocery_list(tools, monkeypatch, service, expected):
+    monkeypatch.setattr(sys.modules["grocery_services"], "delete_grocery_list", AsyncMock(**service), raising=False)
     tool_cls = tools["clear_grocery_list_tool"].ClearGroceryListTool
     tool = tool_cls(user_id=1, user_timezone_str="UTC")
     result = tool._run()
-    assert result.startswith("Successfully cleared")
-
-
-def test_show_grocery_list(tools):
-    tool_cls = tools["show_grocery_list_tool"].ShowGroceryListTool
-    tool = tool_cls(user_id=1, user_timezone_str="UTC")
-    result = tool._run()
-    assert result.startswith("Your grocery list")
-
-
-def test_show_grocery_list_empty(tools, monkeypatch):
-    gs = sys.modules["grocery_services"]
-    async def empty_list(*args, **kwargs):
-        return []
-    gs.get_grocery_list.side_effect = empty_list
+    assert result.startswith(expected)
+
+
+@pytest.mark.parametrize(
+    "service,expected",
+    [
+        ({"return_value": ["milk"]}, "Your grocery list: milk"),
+        ({"return_value": []}, "Your grocery list is currently empty"),
+        ({"return_value": None}, "Error: Could not retrieve"),
+        ({"side_effect": Exception("boom")}, "An unexpected error"),
+    ],
+    ids=["items", "empty", "service_failure", "service_exception"],
+)
+def test_show_grocery_list(tools, monkeypatch, service, expected):
+    monkeypatch.setattr(sys.modules["grocery_services"], "get_grocery_list", AsyncMock(**service), raising=False)
     tool_cls = tools["show_grocery_list_tool"].ShowGroceryListTool
     tool = tool_cls(user_id=1, user_timezone_str="UTC")
     result = tool._run()
-    assert "currently empty" in result
+    assert result.startswith(expected)
 
 
 def test_get_current_time(tools, monkeypatch):